@@ -0,0 +1,69 @@
+import numpy as np
+from numba import njit
+
+
+def extract_values(var_dict, hours):
+    """Read solved PuLP variable values for ``hours`` into a float64 array."""
+    return np.fromiter((var_dict[h].varValue for h in hours), dtype=np.float64, count=len(hours))
+
+
+# Kernels below are compiled eagerly from explicit signatures and without a CPython
+# wrapper: they are only called from postprocess(), never from Python directly.
+@njit("float64[:, :](float64[:], float64[:], float64[:], float64[:], float64[:], float64, float64)",
+      cache=True, no_cpython_wrapper=True)
+def _hourly_costs(coal_out, wind_out, charge_out, discharge_out, coal_cost_arr, wind_cost, deg):
+    n = coal_out.shape[0]
+    costs = np.empty((n, 3))
+    for k in range(n):
+        costs[k, 0] = coal_cost_arr[k] * coal_out[k]
+        costs[k, 1] = wind_cost * wind_out[k]
+        costs[k, 2] = deg * 0.5 * (charge_out[k] + discharge_out[k])
+    return costs
+
+
+@njit("float64[:](float64[:], float64[:])", cache=True, no_cpython_wrapper=True)
+def _cumulative_throughput(charge_out, discharge_out):
+    n = charge_out.shape[0]
+    throughput = np.empty(n)
+    total = 0.0
+    for k in range(n):
+        total += charge_out[k] + discharge_out[k]
+        throughput[k] = total
+    return throughput
+
+
+@njit("float64[:](float64[:], float64[:], float64[:], float64, float64, float64, float64)",
+      cache=True, no_cpython_wrapper=True)
+def _soc_residual(energy_out, charge_out, discharge_out, initial_energy, charge_eff, discharge_eff, loss):
+    n = energy_out.shape[0]
+    residual = np.empty(n)
+    prev_energy = initial_energy
+    for k in range(n):
+        # energy[h] - (1-loss)*energy[h-1] - (charge_eff*charge[h] - discharge[h]/discharge_eff)
+        net_flow = charge_eff * charge_out[k] - discharge_out[k] / discharge_eff
+        residual[k] = energy_out[k] - (1.0 - loss) * prev_energy - net_flow
+        prev_energy = energy_out[k]
+    return residual
+
+
+@njit("Tuple((float64[:, :], float64[:], float64[:]))"
+      "(float64[:], float64[:], float64[:], float64[:], float64[:], float64[:], float64, float64, float64,"
+      " float64, float64, float64)",
+      cache=True)
+def postprocess(coal_out, wind_out, charge_out, discharge_out, energy_out,
+                coal_cost_arr, wind_cost, deg, initial_energy,
+                charge_eff, discharge_eff, loss):
+    """Per-hour cost breakdown, cumulative battery throughput and SOC check.
+
+    Returns ``(costs, throughput, soc_residual)`` where ``costs`` has columns
+    coal, wind and degradation cost. Degradation uses the same linear
+    approximation as the models: ``deg * 0.5 * (charge + discharge)``.
+    ``soc_residual`` is the per-hour error of the solved SOC against the
+    efficiency-adjusted recurrence (should be ~0 up to solver tolerance).
+    All arrays must be float64; scalars are converted to float64.
+    """
+    costs = _hourly_costs(coal_out, wind_out, charge_out, discharge_out, coal_cost_arr, wind_cost, deg)
+    throughput = _cumulative_throughput(charge_out, discharge_out)
+    soc_residual = _soc_residual(energy_out, charge_out, discharge_out, initial_energy,
+                                 charge_eff, discharge_eff, loss)
+    return costs, throughput, soc_residual
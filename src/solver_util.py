@@ -0,0 +1,40 @@
+import os
+
+import pulp
+
+# Bundled CBC binary, resolved once so repeated solves in a sweep skip the executable lookup
+CBC_PATH = pulp.PULP_CBC_CMD.pulp_cbc_path
+
+
+def get_solver(use_gurobi=False):
+    """Return the fastest available PuLP solver.
+
+    Preference order is HiGHS (in-memory API), HiGHS command line, CBC with
+    all cores, then Gurobi. ``use_gurobi=True`` moves Gurobi to the front.
+    Raises ``pulp.PulpSolverError`` if none of them is available.
+    """
+    candidates = []
+    if use_gurobi:
+        candidates.append(lambda: pulp.GUROBI_CMD(msg=False))
+    if hasattr(pulp, "HiGHS"):
+        candidates.append(lambda: pulp.HiGHS(msg=False))
+    candidates.append(lambda: pulp.HiGHS_CMD(msg=False))
+    candidates.append(lambda: pulp.PULP_CBC_CMD(msg=False, threads=os.cpu_count()))
+    if not use_gurobi:
+        candidates.append(lambda: pulp.GUROBI_CMD(msg=False))
+
+    for make_solver in candidates:
+        solver = make_solver()
+        if solver.available():
+            return solver
+
+    raise pulp.PulpSolverError("no LP solver available (tried HiGHS, CBC and Gurobi)")
+
+
+def get_warm_start_solver():
+    """CBC solver that warm-starts from the variables' current values.
+
+    Meant for parameter sweeps that re-solve the same model: after the first
+    solve, each call starts from the previous solution.
+    """
+    return pulp.COIN_CMD(path=CBC_PATH, msg=False, warmStart=True)
@@ -1,6 +1,9 @@
+import numpy as np
 import pulp
 import pandas as pd
 
+from solver_util import get_solver
+
 # -------------------
 # 1. Data setup
 # -------------------
@@ -21,49 +24,61 @@ demand_data = {
 # Convert to DataFrame for convenience
 demand_df = pd.DataFrame(demand_data, index=hours)
 
+# Plain arrays for hot-loop scalar access (avoids DataFrame .loc label lookups)
+demand_np = demand_df[cities].to_numpy(dtype=np.float64)
+plant_idx = {p: k for k, p in enumerate(plants)}
+city_idx = {c: k for k, c in enumerate(cities)}
+
 # Hourly capacity for each plant (MWh)
 capacity = {
     "Coal": 150,
     "Wind": 100
 }
 
-# Hourly cost per MWh for each plant (can vary with time)
-cost_data = {
-    "Coal": [50]*24,  # constant price for simplicity
-    "Wind": [40 if 8 <= h <= 18 else 60 for h in hours]  # cheaper during the day
-}
+# Hourly cost per MWh for each plant (can vary with time), rows ordered as `plants`.
+# Stored as a packed float32 array so cost adjustments (peak surcharges, carbon adders)
+# are vectorized numpy ops; values go to PuLP as Python floats via .tolist().
+hour_arr = np.arange(len(hours))
+cost_arr = np.zeros((len(plants), len(hours)), dtype=np.float32)
+cost_arr[plant_idx["Coal"]] = 50.0  # constant price for simplicity
+cost_arr[plant_idx["Wind"]] = np.where((hour_arr >= 8) & (hour_arr <= 18), 40.0, 60.0)  # cheaper during the day
 
 # -------------------
 # 2. Define the model
 # -------------------
 model = pulp.LpProblem("24h_Electricity_Supply", pulp.LpMinimize)
 
-# Decision variables: x[(plant, city, hour)]
-x = pulp.LpVariable.dicts(
-    "Power",
-    [(i, j, t) for i in plants for j in cities for t in hours],
-    lowBound=0,
-    cat='Continuous'
-)
+P, C, T = len(plants), len(cities), len(hours)
+
+# Decision variables: x[plant_idx, city_idx, hour] as a (P, C, T) object array
+x = np.array(pulp.LpVariable.matrix("Power", (range(P), range(C), range(T)), lowBound=0))
+
+# Cost coefficients broadcast over cities: (P, C, T)
+cost_coefs = np.broadcast_to(cost_arr[:, None, :], (P, C, T))
 
 # Objective: Minimize total cost
-model += pulp.lpSum(cost_data[i][t] * x[(i, j, t)]
-                    for i in plants for j in cities for t in hours)
+model += pulp.LpAffineExpression(list(zip(x.ravel().tolist(), cost_coefs.ravel().tolist())))
+
+# Pre-flattened variable lists per constraint row, used with pulp.lpDot
+demand_vars = {(j, t): x[:, city_idx[j], t].tolist() for j in cities for t in hours}
+capacity_vars = {(i, t): x[plant_idx[i], :, t].tolist() for i in plants for t in hours}
+demand_ones = [1.0] * P
+capacity_ones = [1.0] * C
 
 # Demand constraints: each city's hourly demand must be met
 for j in cities:
     for t in hours:
-        model += pulp.lpSum(x[(i, j, t)] for i in plants) == demand_df.loc[t, j]
+        model += pulp.lpDot(demand_vars[(j, t)], demand_ones) == demand_np[t, city_idx[j]]
 
 # Capacity constraints: each plant can't produce more than capacity per hour
 for i in plants:
     for t in hours:
-        model += pulp.lpSum(x[(i, j, t)] for j in cities) <= capacity[i]
+        model += pulp.lpDot(capacity_vars[(i, t)], capacity_ones) <= capacity[i]
 
 # -------------------
 # 3. Solve
 # -------------------
-model.solve()
+model.solve(get_solver())
 
 # -------------------
 # 4. Results
@@ -74,6 +89,6 @@ print("Total Daily Cost = ", pulp.value(model.objective))
 # Show first few hours of allocations
 for t in range(5):  # just first 5 hours
     print(f"\nHour {t}")
-    for i in plants:
-        for j in cities:
-            print(f"{i} -> {j}: {x[(i, j, t)].varValue} MWh")
+    for i, plant in enumerate(plants):
+        for j, city in enumerate(cities):
+            print(f"{plant} -> {city}: {x[i, j, t].varValue} MWh")
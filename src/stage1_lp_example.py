@@ -1,12 +1,8 @@
-import pulp
+import numpy as np
+from scipy.optimize import linprog
 
 # -------------------
-# 1. Define the problem
-# -------------------
-model = pulp.LpProblem("Electricity_Supply_Optimization", pulp.LpMinimize)
-
-# -------------------
-# 2. Data
+# 1. Data
 # -------------------
 plants = ["Coal", "Wind"]
 cities = ["A", "B", "C"]
@@ -31,41 +27,42 @@ demand = {
 }
 
 # -------------------
-# 3. Decision variables
+# 2. Decision variables
 # -------------------
-x = pulp.LpVariable.dicts(
-    "Power",
-    [(i, j) for i in plants for j in cities],
-    lowBound=0,
-    cat='Continuous'
-)
+# x[(i, j)] is flattened to x[k] with k = i_idx * len(cities) + j_idx
+P, C = len(plants), len(cities)
 
 # -------------------
-# 4. Objective function
+# 3. Objective function
 # -------------------
-model += pulp.lpSum(costs[(i, j)] * x[(i, j)] for i in plants for j in cities)
+c = np.array([costs[(i, j)] for i in plants for j in cities], dtype=float)
 
 # -------------------
-# 5. Constraints
+# 4. Constraints
 # -------------------
-# Demand must be met
-for j in cities:
-    model += pulp.lpSum(x[(i, j)] for i in plants) == demand[j]
+# Demand must be met: sum over plants of x[i, j] == demand[j]
+A_eq = np.zeros((C, P * C))
+for j in range(C):
+    A_eq[j, j::C] = 1.0
+b_eq = np.array([demand[j] for j in cities], dtype=float)
 
-# Capacity limits
-for i in plants:
-    model += pulp.lpSum(x[(i, j)] for j in cities) <= capacity[i]
+# Capacity limits: sum over cities of x[i, j] <= capacity[i]
+A_ub = np.zeros((P, P * C))
+for i in range(P):
+    A_ub[i, i * C:(i + 1) * C] = 1.0
+b_ub = np.array([capacity[i] for i in plants], dtype=float)
 
 # -------------------
-# 6. Solve
+# 5. Solve
 # -------------------
-model.solve()
+res = linprog(c, A_ub=A_ub, b_ub=b_ub, A_eq=A_eq, b_eq=b_eq, method="highs")
 
 # -------------------
-# 7. Results
+# 6. Results
 # -------------------
-print("Status:", pulp.LpStatus[model.status])
-print("Total Cost = ", pulp.value(model.objective))
-for i in plants:
-    for j in cities:
-        print(f"Electricity from {i} to {j}: {x[(i, j)].varValue} MWh")
+print("Status:", res.message)
+print("Total Cost = ", res.fun)
+x = res.x.reshape(P, C)
+for i, plant in enumerate(plants):
+    for j, city in enumerate(cities):
+        print(f"Electricity from {plant} to {city}: {x[i, j]} MWh")
@@ -0,0 +1,140 @@
+import os
+
+import numpy as np
+import pandas as pd
+import xarray as xr
+import linopy
+
+from dispatch_util import postprocess
+
+# --------------------------
+# 0. Problem data (toy example; same numbers as trial_pyomo_battery.py)
+# --------------------------
+hours = [1, 2, 3, 4, 5]
+demand = {1: 90, 2: 100, 3: 80, 4: 110, 5: 95}
+
+coal_max = {1: 70, 2: 70, 3: 70, 4: 50, 5: 50}
+wind_max = {1: 40, 2: 50, 3: 30, 4: 45, 5: 35}
+coal_cost = {1: 50, 2: 50, 3: 50, 4: 80, 5: 80}
+wind_cost = 20
+
+battery_capacity = 40
+charge_power_limit = 20
+discharge_power_limit = 20
+charge_eff = 0.95
+discharge_eff = 0.95
+degradation_cost_per_mwh = 5.0
+standing_loss_fraction = 0.0
+initial_energy = 0.0
+
+# Hourly data as xarray DataArrays over the "hour" dimension
+H = pd.Index(hours, name="hour")
+
+def _series(d):
+    return xr.DataArray([d[h] for h in hours], coords=[H])
+
+demand_da = _series(demand)
+coal_cost_da = _series(coal_cost)
+
+# --------------------------
+# 1. Build Linopy model
+# --------------------------
+# Linopy stores variables/constraints as arrays over coords, so every block below
+# is one vectorized call for the whole horizon instead of one Python object per hour.
+m = linopy.Model()
+
+# --------------------------
+# 2. Variables (capacity limits become variable bounds)
+# --------------------------
+coal = m.add_variables(lower=0, upper=_series(coal_max), coords=[H], name="coal")
+wind = m.add_variables(lower=0, upper=_series(wind_max), coords=[H], name="wind")
+charge = m.add_variables(lower=0, upper=charge_power_limit, coords=[H], name="charge")
+discharge = m.add_variables(lower=0, upper=discharge_power_limit, coords=[H], name="discharge")
+energy = m.add_variables(lower=0, upper=battery_capacity, coords=[H], name="energy")
+
+# --------------------------
+# 3. Objective: generation cost + degradation cost
+# --------------------------
+# approximate throughput cost with average of charge & discharge (linear)
+m.add_objective(
+    (coal_cost_da * coal + wind_cost * wind
+     + 0.5 * degradation_cost_per_mwh * (charge + discharge)).sum()
+)
+
+# --------------------------
+# 4. Constraints
+# --------------------------
+# generation + discharge - charge == demand
+m.add_constraints(coal + wind + discharge - charge == demand_da, name="PowerBalance")
+
+# Energy (SOC) dynamics with efficiencies and optional standing loss:
+# energy[h] - charge_eff*charge[h] + discharge[h]/discharge_eff - (1-loss)*energy[h-1] == 0,
+# with the (1-loss)*initial_energy term on the RHS for the first hour
+# (energy.shift leaves the first hour's previous-SOC term empty).
+one_minus_loss = 1.0 - standing_loss_fraction
+soc_rhs = xr.zeros_like(demand_da, dtype=float)
+soc_rhs[0] = one_minus_loss * initial_energy
+m.add_constraints(
+    energy - charge_eff * charge + (1.0 / discharge_eff) * discharge
+    - one_minus_loss * energy.shift(hour=1) == soc_rhs,
+    name="EnergyBalance",
+)
+
+# Optional: force end-of-horizon SOC to zero (avoid "value hiding" after horizon)
+m.add_constraints(energy.isel(hour=-1) == 0.0, name="EndOfHorizonSOC")
+
+# --------------------------
+# 5. Solve (HiGHS, in-memory: no LP-file round trip)
+# --------------------------
+status, termination_condition = m.solve(solver_name="highs", io_api="direct")
+
+# --------------------------
+# 6. Show results
+# --------------------------
+print("Solver status:", status)
+print("Solver termination condition:", termination_condition)
+print("Objective (total cost + degradation) = ", m.objective.value)
+print()
+
+coal_out = coal.solution.to_numpy()
+wind_out = wind.solution.to_numpy()
+charge_out = charge.solution.to_numpy()
+discharge_out = discharge.solution.to_numpy()
+energy_out = energy.solution.to_numpy()
+
+for h, c, w, ch, dis, e in zip(hours, coal_out, wind_out, charge_out, discharge_out, energy_out):
+    print(f"Hour {h}: Coal={c:.2f}, Wind={w:.2f}, "
+          f"Charge={ch:.2f}, Discharge={dis:.2f}, SOC={e:.2f}")
+
+coal_cost_arr = coal_cost_da.to_numpy().astype(np.float64)
+costs, throughput, soc_residual = postprocess(coal_out, wind_out, charge_out, discharge_out, energy_out,
+                                              coal_cost_arr, float(wind_cost), degradation_cost_per_mwh, initial_energy,
+                                              charge_eff, discharge_eff, standing_loss_fraction)
+print()
+print(f"Coal cost=${costs[:, 0].sum():.2f}, Wind cost=${costs[:, 1].sum():.2f}, "
+      f"Degradation cost=${costs[:, 2].sum():.2f}, Battery throughput={throughput[-1]:.2f} MWh")
+print(f"Max SOC balance residual = {np.abs(soc_residual).max():.2e} MWh")
+
+# --------------------------
+# 7. Plot (optional)
+# --------------------------
+def _plot(hours, coal_out, wind_out, charge_out, discharge_out, energy_out):
+    import matplotlib.pyplot as plt
+
+    fig, ax = plt.subplots(figsize=(9,5))
+    ax.stackplot(hours, np.vstack([wind_out, coal_out]), labels=["Wind", "Coal"],
+                 colors=["skyblue", "lightcoral"], edgecolor='k')
+    ax.bar(hours, charge_out, label="Charge", color="green", alpha=0.6)
+    ax.bar(hours, -discharge_out, label="Discharge", color="orange", alpha=0.6)
+    ax2 = ax.twinx()
+    ax2.plot(hours, energy_out, '-o', color='black', label='SOC')
+    ax.set_xlabel("Hour")
+    ax.set_ylabel("MWh")
+    ax.set_title("Linopy: Dispatch with realistic battery costs & efficiencies")
+    ax.legend(loc='upper left')
+    ax.grid(True, linestyle='--', alpha=0.4)
+    plt.show()
+
+
+if __name__ == "__main__" and os.environ.get("NO_PLOT") != "1":
+    _plot(hours, coal_out, wind_out, charge_out, discharge_out, energy_out)
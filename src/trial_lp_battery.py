@@ -1,6 +1,8 @@
 import pulp
 import matplotlib.pyplot as plt
 
+from solver_util import get_solver
+
 # --------------------------
 # 1. INPUT DATA (example)
 # --------------------------
@@ -90,7 +92,7 @@ for h in hours:
 # --------------------------
 # 6. SOLVE
 # --------------------------
-model.solve()
+model.solve(get_solver())
 
 # --------------------------
 # 7. RESULTS (print)
@@ -1,5 +1,12 @@
+import os
+
+import numpy as np
+import pandas as pd
 import pulp
-import matplotlib.pyplot as plt
+from joblib import Parallel, delayed
+
+from dispatch_util import extract_values, postprocess
+from solver_util import get_solver, get_warm_start_solver
 
 # --------------------------
 # 1. INPUT DATA (toy example)
@@ -35,97 +42,282 @@ standing_loss_fraction = 0.0
 # initial state of charge (MWh)
 initial_energy = 0.0
 
-# --------------------------
-# 3. CREATE PROBLEM
-# --------------------------
-model = pulp.LpProblem("Stage3_Battery_Realistic", pulp.LpMinimize)
+# Horizon decomposition for scaled runs (see solve_horizon_parallel)
+slice_len = 3                # hours per slice
+boundary_penalty = 1e4       # $/MWh on boundary SOC violations, well above any marginal value of stored energy
 
-# --------------------------
-# 4. DECISION VARIABLES
-# --------------------------
-coal = pulp.LpVariable.dicts("Coal", hours, lowBound=0)
-wind = pulp.LpVariable.dicts("Wind", hours, lowBound=0)
-charge = pulp.LpVariable.dicts("Charge", hours, lowBound=0, upBound=charge_power_limit)
-discharge = pulp.LpVariable.dicts("Discharge", hours, lowBound=0, upBound=discharge_power_limit)
-energy = pulp.LpVariable.dicts("Energy", hours, lowBound=0, upBound=battery_capacity)
 
-# --------------------------
-# 5. OBJECTIVE: generation cost + degradation cost
-# --------------------------
-# Degradation cost is applied to throughput (we use average of charge+discharge to approximate cycles).
-# You could alternatively use just charge or just discharge; both are linear approximations.
-gen_cost = pulp.lpSum(coal_cost[h] * coal[h] + wind_cost * wind[h] for h in hours)
-deg_cost = pulp.lpSum(degradation_cost_per_mwh * 0.5 * (charge[h] + discharge[h]) for h in hours)
-model += gen_cost + deg_cost, "TotalCost_with_Degradation"
+def total_cost_expr(variables, hours_slice, deg_cost):
+    """Generation cost + degradation cost for the given degradation cost ($/MWh throughput)."""
+    coal, wind = variables["coal"], variables["wind"]
+    charge, discharge = variables["charge"], variables["discharge"]
+    # Degradation cost is applied to throughput (we use average of charge+discharge to approximate cycles).
+    # You could alternatively use just charge or just discharge; both are linear approximations.
+    gen_cost = pulp.lpSum(coal_cost[h] * coal[h] + wind_cost * wind[h] for h in hours_slice)
+    deg_cost_term = pulp.lpSum(deg_cost * 0.5 * (charge[h] + discharge[h]) for h in hours_slice)
+    return gen_cost + deg_cost_term
 
-# --------------------------
-# 6. CONSTRAINTS
-# --------------------------
-for h in hours:
-    # Generation capacity limits
-    model += coal[h] <= coal_max[h], f"CoalCap_{h}"
-    model += wind[h] <= wind_max[h], f"WindCap_{h}"
-
-    # Battery charge/discharge bounds already enforced via upBound in variables
-
-    # Power balance:
-    # generation + discharge == demand + charge
-    # note: charge increases the RHS (it is additional sink in the hour)
-    model += coal[h] + wind[h] + discharge[h] == demand[h] + charge[h], f"PowerBalance_{h}"
-
-    # Battery energy bounds already enforced by variable bounds
-
-# Energy (SOC) dynamics with efficiencies & standing loss
-for idx, h in enumerate(hours):
-    loss_term = standing_loss_fraction
-    if idx == 0:
-        # SOC at end of first hour
-        # energy = initial*(1-loss) + charge_eff*charge - discharge / discharge_eff
-        model += energy[h] == (1 - loss_term) * initial_energy + charge_eff * charge[h] - discharge[h] / discharge_eff, f"EnergyBalance_{h}"
+
+def build_model(hours_slice, init_soc, end_soc=None, deg_cost=degradation_cost_per_mwh, penalty=None):
+    """Build the battery dispatch LP over ``hours_slice`` starting from ``init_soc``.
+
+    If ``end_soc`` is given the SOC at the last hour is pinned to it. With a
+    ``penalty`` ($/MWh) the start and end SOC rows become elastic, so the slice
+    is feasible for any boundary SOCs and violations are charged in the objective.
+    Returns ``(model, variables)`` where ``variables`` maps coal, wind,
+    charge, discharge and energy to their per-hour variable dicts.
+    """
+    # --------------------------
+    # 3. CREATE PROBLEM
+    # --------------------------
+    model = pulp.LpProblem("Stage3_Battery_Realistic", pulp.LpMinimize)
+
+    # --------------------------
+    # 4. DECISION VARIABLES
+    # --------------------------
+    coal = pulp.LpVariable.dicts("Coal", hours_slice, lowBound=0)
+    wind = pulp.LpVariable.dicts("Wind", hours_slice, lowBound=0)
+    charge = pulp.LpVariable.dicts("Charge", hours_slice, lowBound=0, upBound=charge_power_limit)
+    discharge = pulp.LpVariable.dicts("Discharge", hours_slice, lowBound=0, upBound=discharge_power_limit)
+    energy = pulp.LpVariable.dicts("Energy", hours_slice, lowBound=0, upBound=battery_capacity)
+
+    variables = {"coal": coal, "wind": wind, "charge": charge, "discharge": discharge, "energy": energy}
+
+    # --------------------------
+    # 5. OBJECTIVE: generation cost + degradation cost
+    # --------------------------
+    cost = total_cost_expr(variables, hours_slice, deg_cost)
+    if penalty is not None:
+        slack = pulp.LpVariable.dicts("BoundarySlack", ["start_up", "start_down", "end_up", "end_down"], lowBound=0)
+        cost += penalty * pulp.lpSum(slack.values())
+    model += cost, "TotalCost_with_Degradation"
+
+    # --------------------------
+    # 6. CONSTRAINTS
+    # --------------------------
+    for h in hours_slice:
+        # Generation capacity limits
+        model += coal[h] <= coal_max[h], f"CoalCap_{h}"
+        model += wind[h] <= wind_max[h], f"WindCap_{h}"
+
+        # Battery charge/discharge bounds already enforced via upBound in variables
+
+        # Power balance:
+        # generation + discharge == demand + charge
+        # note: charge increases the RHS (it is additional sink in the hour)
+        model += coal[h] + wind[h] + discharge[h] == demand[h] + charge[h], f"PowerBalance_{h}"
+
+        # Battery energy bounds already enforced by variable bounds
+
+    # Energy (SOC) dynamics with efficiencies & standing loss:
+    # energy[h] - charge_eff*charge[h] + discharge[h]/discharge_eff - (1-loss)*energy[prev] == 0
+    # (first hour: the (1-loss)*init term moves to the RHS). Rows are built directly from
+    # (var, coef) terms to skip operator-overloaded expression building.
+    inv_disch = 1.0 / discharge_eff
+    one_minus_loss = 1.0 - standing_loss_fraction
+    for idx, h in enumerate(hours_slice):
+        terms = [(energy[h], 1.0), (charge[h], -charge_eff), (discharge[h], inv_disch)]
+        if idx == 0:
+            rhs = one_minus_loss * init_soc
+            if penalty is not None:
+                terms += [(slack["start_up"], 1.0), (slack["start_down"], -1.0)]
+        else:
+            terms.append((energy[hours_slice[idx - 1]], -one_minus_loss))
+            rhs = 0.0
+        model += pulp.LpAffineExpression(terms) == rhs, f"EnergyBalance_{h}"
+
+    # Optional: pin the SOC at the end of the slice (e.g. 0.0 to empty the battery at the horizon end)
+    if end_soc is not None:
+        end_terms = [(energy[hours_slice[-1]], 1.0)]
+        if penalty is not None:
+            end_terms += [(slack["end_up"], 1.0), (slack["end_down"], -1.0)]
+        model += pulp.LpAffineExpression(end_terms) == end_soc, "EndOfHorizon_SOC"
+
+    return model, variables
+
+
+def solve_slice(hours_slice, init_soc, end_soc=None, penalty=None):
+    """Solve the battery dispatch LP over ``hours_slice`` starting from ``init_soc``.
+
+    Returns ``(final_soc, dispatch_df)``; ``dispatch_df`` is indexed by hour
+    with columns Coal, Wind, Charge, Discharge, SOC, and carries the solver
+    status and objective in ``dispatch_df.attrs``. With a ``penalty`` (see
+    build_model) it also carries ``boundary_duals``: the objective's
+    sensitivity to ``init_soc`` and ``end_soc``.
+    """
+    model, variables = build_model(hours_slice, init_soc, end_soc, penalty=penalty)
+    coal, wind, energy = variables["coal"], variables["wind"], variables["energy"]
+    charge, discharge = variables["charge"], variables["discharge"]
+
+    # --------------------------
+    # 7. SOLVE
+    # --------------------------
+    model.solve(get_solver())
+
+    dispatch_df = pd.DataFrame({
+        "Coal": extract_values(coal, hours_slice),
+        "Wind": extract_values(wind, hours_slice),
+        "Charge": extract_values(charge, hours_slice),
+        "Discharge": extract_values(discharge, hours_slice),
+        "SOC": extract_values(energy, hours_slice),
+    }, index=pd.Index(hours_slice, name="Hour"))
+    dispatch_df.attrs["status"] = pulp.LpStatus[model.status]
+    dispatch_df.attrs["objective"] = pulp.value(model.objective)
+    if penalty is not None:
+        start_row = model.constraints[f"EnergyBalance_{hours_slice[0]}"]
+        end_row = model.constraints["EndOfHorizon_SOC"]
+        dispatch_df.attrs["boundary_duals"] = ((1.0 - standing_loss_fraction) * start_row.pi, end_row.pi)
+    return dispatch_df["SOC"].iloc[-1], dispatch_df
+
+
+def sweep_degradation_cost(deg_costs):
+    """Re-solve the full-horizon model for each degradation cost in ``deg_costs``.
+
+    The model is built once; each step only swaps the objective and CBC is
+    warm-started from the previous solution. Returns ``{deg_cost: objective}``.
+    """
+    model, variables = build_model(hours, initial_energy, end_soc=0.0)
+    objectives = {}
+    for deg in deg_costs:
+        model.setObjective(total_cost_expr(variables, hours, deg))
+        model.solve(get_warm_start_solver())
+        objectives[deg] = pulp.value(model.objective)
+    return objectives
+
+
+def solve_horizon_parallel(hours, slice_len, n_jobs=-1, max_iter=50, tol=1e-6):
+    """Solve the full horizon as slices in parallel, coupled by an LP over the boundary SOCs.
+
+    Benders decomposition: each round solves every slice concurrently between
+    the current boundary SOCs, with elastic boundary rows (``boundary_penalty``)
+    so every slice is feasible. Each slice's objective and boundary duals give
+    a cut on its cost as a function of its start and end SOC. The coupling LP
+    minimizes the summed cut models over the shared boundary SOCs, so
+    energy[end of slice i] == energy[start of slice i+1] holds by construction,
+    and proposes the next boundaries. This stops once the slice costs match the
+    coupling LP's lower bound; a final concurrent pass re-solves each slice
+    with its boundary SOCs pinned exactly.
+    """
+    slices = [hours[k:k + slice_len] for k in range(0, len(hours), slice_len)]
+    parallel = Parallel(n_jobs=n_jobs, backend="loky")
+
+    # Coupling LP: inner boundary SOCs plus one cost estimate per slice (slice costs are nonnegative)
+    coupling = pulp.LpProblem("Slice_Coupling", pulp.LpMinimize)
+    soc = pulp.LpVariable.dicts("BoundarySOC", range(1, len(slices)), lowBound=0, upBound=battery_capacity)
+    theta = pulp.LpVariable.dicts("SliceCost", range(len(slices)), lowBound=0)
+    coupling += pulp.lpSum(theta.values()), "TotalSliceCost"
+    # boundaries[i] is the start SOC of slice i; the horizon starts at initial_energy and ends empty
+    boundary_terms = [None] + [soc[i] for i in range(1, len(slices))] + [None]
+
+    boundaries = [initial_energy] + [0.0] * (len(slices) - 1) + [0.0]
+    best_cost, best_boundaries = float("inf"), boundaries
+    for it in range(max_iter):
+        results = parallel(
+            delayed(solve_slice)(sl, boundaries[i], boundaries[i + 1], boundary_penalty)
+            for i, sl in enumerate(slices)
+        )
+        cost = 0.0
+        for i, (sl, (_, df)) in enumerate(zip(slices, results)):
+            if df.attrs["status"] != "Optimal":
+                raise RuntimeError(f"Elastic slice {sl[0]}-{sl[-1]} is {df.attrs['status']}")
+            cost += df.attrs["objective"]
+            # cut: theta[i] >= objective + d_start*(soc[i] - start) + d_end*(soc[i+1] - end)
+            cut = [(theta[i], 1.0)]
+            constant = df.attrs["objective"]
+            for k, dual in zip((i, i + 1), df.attrs["boundary_duals"]):
+                if boundary_terms[k] is not None:
+                    cut.append((boundary_terms[k], -dual))
+                    constant -= dual * boundaries[k]
+            coupling += pulp.LpAffineExpression(cut) >= constant, f"Cut_{it}_{i}"
+        if cost < best_cost:
+            best_cost, best_boundaries = cost, boundaries
+
+        coupling.solve(get_solver())
+        if coupling.status != pulp.LpStatusOptimal:
+            raise RuntimeError(f"Coupling LP is {pulp.LpStatus[coupling.status]}")
+        if best_cost - pulp.value(coupling.objective) <= tol * max(1.0, abs(best_cost)):
+            break
+        # clip solver round-off so the boundaries stay inside the SOC variable bounds
+        boundaries = ([initial_energy]
+                      + [float(np.clip(soc[i].varValue, 0.0, battery_capacity)) for i in range(1, len(slices))]
+                      + [0.0])
     else:
-        prev = hours[idx - 1]
-        model += energy[h] == (1 - loss_term) * energy[prev] + charge_eff * charge[h] - discharge[h] / discharge_eff, f"EnergyBalance_{h}"
+        raise RuntimeError(f"Slice coupling did not converge in {max_iter} rounds")
 
-# Optional: ensure battery is emptied at end (or comment out to allow residual SOC)
-model += energy[hours[-1]] == 0.0, "EndOfHorizon_SOC"
+    # Final pass: each slice starts exactly where the previous one ends
+    final_pass = parallel(
+        delayed(solve_slice)(sl, best_boundaries[i], best_boundaries[i + 1])
+        for i, sl in enumerate(slices)
+    )
+    for sl, (_, df) in zip(slices, final_pass):
+        if df.attrs["status"] != "Optimal":
+            raise RuntimeError(f"Slice {sl[0]}-{sl[-1]} is {df.attrs['status']} with the coupled boundary SOC; "
+                               f"the full horizon may be infeasible")
 
-# --------------------------
-# 7. SOLVE
-# --------------------------
-model.solve()
+    dispatch_df = pd.concat([df for _, df in final_pass])
+    dispatch_df.attrs["objective"] = sum(df.attrs["objective"] for _, df in final_pass)
+    return dispatch_df
 
-# --------------------------
-# 8. PRINT RESULTS
-# --------------------------
-print("Status:", pulp.LpStatus[model.status])
-print("Objective (total cost + degradation) = ", pulp.value(model.objective))
-print()
 
-coal_out, wind_out, charge_out, discharge_out, energy_out = [], [], [], [], []
-for h in hours:
-    c = coal[h].varValue
-    w = wind[h].varValue
-    ch = charge[h].varValue
-    dis = discharge[h].varValue
-    e = energy[h].varValue
+def _plot(hours, coal_out, wind_out, charge_out, discharge_out, energy_out):
+    import matplotlib.pyplot as plt
 
-    coal_out.append(c); wind_out.append(w)
-    charge_out.append(ch); discharge_out.append(dis); energy_out.append(e)
+    fig, ax = plt.subplots(figsize=(9,5))
+    ax.stackplot(hours, np.vstack([wind_out, coal_out]), labels=["Wind", "Coal"],
+                 colors=["skyblue", "lightcoral"], edgecolor='k')
+    ax.bar(hours, charge_out, label="Charge", color="green", alpha=0.6)
+    ax.bar(hours, -discharge_out, label="Discharge", color="orange", alpha=0.6)
+    ax.twinx().plot(hours, energy_out, '-o', color='black', label='SOC')
+    ax.set_xlabel("Hour")
+    ax.set_ylabel("MWh")
+    ax.set_title("Dispatch with realistic battery costs & efficiencies")
+    ax.legend(loc='upper left')
+    ax.grid(True, linestyle='--', alpha=0.4)
+    plt.show()
 
-    print(f"Hour {h}: Coal={c:.2f}, Wind={w:.2f}, Charge={ch:.2f}, Discharge={dis:.2f}, SOC={e:.2f}")
 
-# --------------------------
-# 9. PLOT (optional)
-# --------------------------
-plt.figure(figsize=(9,5))
-plt.bar(hours, wind_out, label="Wind", color="skyblue", edgecolor='k')
-plt.bar(hours, coal_out, bottom=wind_out, label="Coal", color="lightcoral", edgecolor='k')
-plt.bar(hours, charge_out, label="Charge", color="green", alpha=0.6)
-plt.bar(hours, [-d for d in discharge_out], label="Discharge", color="orange", alpha=0.6)
-plt.twinx().plot(hours, energy_out, '-o', color='black', label='SOC')
-plt.xlabel("Hour")
-plt.ylabel("MWh")
-plt.title("Dispatch with realistic battery costs & efficiencies")
-plt.legend(loc='upper left')
-plt.grid(True, linestyle='--', alpha=0.4)
-plt.show()
+if __name__ == "__main__":
+    _, dispatch_df = solve_slice(hours, initial_energy, end_soc=0.0)
+
+    # --------------------------
+    # 8. PRINT RESULTS
+    # --------------------------
+    print("Status:", dispatch_df.attrs["status"])
+    print("Objective (total cost + degradation) = ", dispatch_df.attrs["objective"])
+    print()
+
+    # writable copies: postprocess() is compiled for plain (non-readonly) float64 arrays
+    coal_out = dispatch_df["Coal"].to_numpy(copy=True)
+    wind_out = dispatch_df["Wind"].to_numpy(copy=True)
+    charge_out = dispatch_df["Charge"].to_numpy(copy=True)
+    discharge_out = dispatch_df["Discharge"].to_numpy(copy=True)
+    energy_out = dispatch_df["SOC"].to_numpy(copy=True)
+
+    for h, c, w, ch, dis, e in zip(hours, coal_out, wind_out, charge_out, discharge_out, energy_out):
+        print(f"Hour {h}: Coal={c:.2f}, Wind={w:.2f}, Charge={ch:.2f}, Discharge={dis:.2f}, SOC={e:.2f}")
+
+    coal_cost_arr = np.array([coal_cost[h] for h in hours], dtype=np.float64)
+    costs, throughput, soc_residual = postprocess(coal_out, wind_out, charge_out, discharge_out, energy_out,
+                                                  coal_cost_arr, float(wind_cost), degradation_cost_per_mwh, initial_energy,
+                                                  charge_eff, discharge_eff, standing_loss_fraction)
+    print()
+    print(f"Coal cost=${costs[:, 0].sum():.2f}, Wind cost=${costs[:, 1].sum():.2f}, "
+          f"Degradation cost=${costs[:, 2].sum():.2f}, Battery throughput={throughput[-1]:.2f} MWh")
+    print(f"Max SOC balance residual = {np.abs(soc_residual).max():.2e} MWh")
+
+    # Sliced solve (parallel across slices) for comparison; opt-in with RUN_SLICED=1 since
+    # starting the process pool costs more than the whole toy solve
+    if os.environ.get("RUN_SLICED") == "1":
+        sliced_df = solve_horizon_parallel(hours, slice_len)
+        print(f"Sliced objective ({slice_len}h slices) = ", sliced_df.attrs["objective"])
+
+    # Degradation cost sweep (model built once, warm-started re-solves); opt-in with RUN_SWEEP=1
+    if os.environ.get("RUN_SWEEP") == "1":
+        for deg, obj in sweep_degradation_cost([1.0, 5.0, 10.0]).items():
+            print(f"Degradation cost ${deg:.1f}/MWh -> objective = {obj:.2f}")
+
+    # --------------------------
+    # 9. PLOT (optional; set NO_PLOT=1 to skip)
+    # --------------------------
+    if os.environ.get("NO_PLOT") != "1":
+        _plot(hours, coal_out, wind_out, charge_out, discharge_out, energy_out)
@@ -1,5 +1,10 @@
+import os
+
+import numpy as np
 import pulp
-import matplotlib.pyplot as plt
+
+from dispatch_util import extract_values, postprocess
+from solver_util import get_solver
 
 # --------------------------
 # 1. INPUT DATA
@@ -58,8 +63,7 @@ for h in hours:
     # power balance: generation + discharge == demand + charge
     model += coal[h] + wind[h] + discharge[h] == demand[h] + charge[h], f"PowerBalance_hour_{h}"
 
-    # battery energy limits (energy variable bounds already enforce 0..battery_capacity)
-    model += energy[h] <= battery_capacity, f"BatteryCap_hour_{h}"
+    # battery energy limits are enforced by the energy variable bounds (0..battery_capacity)
 
 # energy dynamics (time coupling)
 for idx, h in enumerate(hours):
@@ -76,7 +80,7 @@ model += energy[hours[-1]] == 0.0, "EndOfHorizon_SOC"
 # --------------------------
 # 6. SOLVE
 # --------------------------
-model.solve()
+model.solve(get_solver())
 
 # --------------------------
 # 7. OUTPUT RESULTS
@@ -85,47 +89,49 @@ print("Status:", pulp.LpStatus[model.status])
 print("Total Cost ($) =", pulp.value(model.objective))
 print()
 
-coal_out = []
-wind_out = []
-charge_out = []
-discharge_out = []
-energy_out = []
-
-for h in hours:
-    c = coal[h].varValue
-    w = wind[h].varValue
-    ch = charge[h].varValue
-    dis = discharge[h].varValue
-    e = energy[h].varValue
-
-    coal_out.append(c)
-    wind_out.append(w)
-    charge_out.append(ch)
-    discharge_out.append(dis)
-    energy_out.append(e)
+coal_out = extract_values(coal, hours)
+wind_out = extract_values(wind, hours)
+charge_out = extract_values(charge, hours)
+discharge_out = extract_values(discharge, hours)
+energy_out = extract_values(energy, hours)
 
+for h, c, w, ch, dis, e in zip(hours, coal_out, wind_out, charge_out, discharge_out, energy_out):
     print(f"Hour {h}: Coal={c:.2f}, Wind={w:.2f}, Charge={ch:.2f}, Discharge={dis:.2f}, Energy={e:.2f}")
 
+coal_cost_arr = np.array([coal_cost[h] for h in hours], dtype=np.float64)
+costs, throughput, soc_residual = postprocess(coal_out, wind_out, charge_out, discharge_out, energy_out,
+                                              coal_cost_arr, float(wind_cost), 0.0, initial_energy,
+                                              charge_eff, discharge_eff, 0.0)
+print()
+print(f"Coal cost=${costs[:, 0].sum():.2f}, Wind cost=${costs[:, 1].sum():.2f}, "
+      f"Battery throughput={throughput[-1]:.2f} MWh")
+print(f"Max SOC balance residual = {np.abs(soc_residual).max():.2e} MWh")
+
 # --------------------------
 # 8. PLOT (visualize dispatch & battery SOC)
 # --------------------------
-plt.figure(figsize=(10, 6))
+def _plot(hours, coal_out, wind_out, charge_out, discharge_out, energy_out, demand):
+    import matplotlib.pyplot as plt
+
+    fig, ax = plt.subplots(figsize=(10, 6))
+
+    # stacked generation: coal bottom, wind above; battery charge/discharge shown separately as lines
+    ax.stackplot(hours, np.vstack([coal_out, wind_out]), labels=["Coal", "Wind"], colors=["gray", "skyblue"])
 
-# stacked bars: coal bottom, wind above; battery charge/discharge shown separately as lines
-plt.bar(hours, coal_out, label="Coal", color="gray")
-plt.bar(hours, wind_out, bottom=coal_out, label="Wind", color="skyblue")
+    # show charge/discharge as stem or dashed lines for clarity
+    ax.step(hours, energy_out, where='mid', label="Battery SOC (MWh)", color="orange", linewidth=2)
+    ax.plot(hours, charge_out, '--', label="Charge (MWh/h)", color="green")
+    ax.plot(hours, discharge_out, '--', label="Discharge (MWh/h)", color="red")
 
-# show charge/discharge as stem or dashed lines for clarity
-plt.step(hours, energy_out, where='mid', label="Battery SOC (MWh)", color="orange", linewidth=2)
-plt.plot(hours, charge_out, '--', label="Charge (MWh/h)", color="green")
-plt.plot(hours, discharge_out, '--', label="Discharge (MWh/h)", color="red")
+    ax.plot(hours, [demand[h] for h in hours], 'k:', label="Demand")
 
-plt.plot(hours, [demand[h] for h in hours], 'k:', label="Demand")
+    ax.set_xlabel("Hour")
+    ax.set_ylabel("MWh")
+    ax.set_title("Optimal Dispatch + Battery SOC")
+    ax.legend()
+    ax.grid(True, linestyle='--', alpha=0.5)
+    plt.show()
 
-plt.xlabel("Hour")
-plt.ylabel("MWh")
-plt.title("Optimal Dispatch + Battery SOC")
-plt.legend()
-plt.grid(True, linestyle='--', alpha=0.5)
-plt.show()
 
+if __name__ == "__main__" and os.environ.get("NO_PLOT") != "1":
+    _plot(hours, coal_out, wind_out, charge_out, discharge_out, energy_out, demand)
@@ -1,5 +1,7 @@
 import pulp
 
+from solver_util import get_solver
+
 # Example hourly demand for 5 hours
 hours = [1, 2, 3, 4, 5]
 demand = {1: 90, 2: 100, 3: 80, 4: 110, 5: 95}
@@ -21,9 +23,10 @@ coal = pulp.LpVariable.dicts("Coal", hours, lowBound=0)
 wind = pulp.LpVariable.dicts("Wind", hours, lowBound=0)
 
 # 3. Objective function: Minimize total cost across all hours
-model += pulp.lpSum(
-    coal_cost * coal[h] + wind_cost * wind[h] for h in hours
-), "TotalDailyCost"
+#    Built with one lpDot over flat variable / coefficient lists
+all_vars = [coal[h] for h in hours] + [wind[h] for h in hours]
+all_coefs = [coal_cost] * len(hours) + [wind_cost] * len(hours)
+model += pulp.lpDot(all_vars, all_coefs), "TotalDailyCost"
 
 # 4. Constraints
 for h in hours:
@@ -35,7 +38,7 @@ for h in hours:
     model += wind[h] <= wind_capacity[h], f"WindCap_hour_{h}"
 
 # 5. Solve
-model.solve()
+model.solve(get_solver())
 
 # 6. Results
 print("Status:", pulp.LpStatus[model.status])
@@ -1,5 +1,9 @@
+import os
+
+import numpy as np
 import pulp
-import matplotlib.pyplot as plt
+
+from solver_util import get_solver
 
 # --------------------------
 # 1. INPUT DATA
@@ -46,10 +50,10 @@ wind = pulp.LpVariable.dicts("Wind", hours, lowBound=0)
 # 4. OBJECTIVE FUNCTION
 # --------------------------
 # Minimize total cost across all hours
-# pulp.lpSum() efficiently adds up costs for all hours
-model += pulp.lpSum(
-    coal_cost * coal[h] + wind_cost * wind[h] for h in hours
-), "TotalDailyCost"
+# pulp.lpDot() pairs each variable with its cost in a single call
+all_vars = [coal[h] for h in hours] + [wind[h] for h in hours]
+all_coefs = [coal_cost] * len(hours) + [wind_cost] * len(hours)
+model += pulp.lpDot(all_vars, all_coefs), "TotalDailyCost"
 
 # --------------------------
 # 5. CONSTRAINTS
@@ -67,7 +71,7 @@ for h in hours:
 # --------------------------
 # 6. SOLVE THE PROBLEM
 # --------------------------
-model.solve()
+model.solve(get_solver())
 
 # --------------------------
 # 7. DISPLAY RESULTS
@@ -89,18 +93,24 @@ print("Total Daily Cost ($) =", pulp.value(model.objective))
 # --------------------------
 # 8. PLOT RESULTS
 # --------------------------
-plt.figure(figsize=(8, 5))
+def _plot(hours, coal_output, wind_output, demand):
+    import matplotlib.pyplot as plt
+
+    fig, ax = plt.subplots(figsize=(8, 5))
+
+    # Stacked area chart: coal first (bottom), wind on top
+    ax.stackplot(hours, np.vstack([coal_output, wind_output]), labels=["Coal", "Wind"], colors=["gray", "skyblue"])
+
+    # Plot demand line for reference
+    ax.plot(hours, [demand[h] for h in hours], "r--", label="Demand")
 
-# Stacked bar chart: coal first (bottom), wind on top
-plt.bar(hours, coal_output, label="Coal", color="gray")
-plt.bar(hours, wind_output, bottom=coal_output, label="Wind", color="skyblue")
+    ax.set_xlabel("Hour")
+    ax.set_ylabel("Energy Production (MWh)")
+    ax.set_title("Optimal Hourly Energy Dispatch")
+    ax.legend()
+    ax.grid(True, linestyle="--", alpha=0.5)
+    plt.show()
 
-# Plot demand line for reference
-plt.plot(hours, [demand[h] for h in hours], "r--", label="Demand")
 
-plt.xlabel("Hour")
-plt.ylabel("Energy Production (MWh)")
-plt.title("Optimal Hourly Energy Dispatch")
-plt.legend()
-plt.grid(True, linestyle="--", alpha=0.5)
-plt.show()
+if __name__ == "__main__" and os.environ.get("NO_PLOT") != "1":
+    _plot(hours, coal_output, wind_output, demand)
@@ -1,29 +1,27 @@
-import pulp
+from scipy.optimize import linprog
 
-# 1. Create the optimization problem: minimize cost
-model = pulp.LpProblem("Energy_Cost_Minimization", pulp.LpMinimize)
+# 1. Decision variables: x = [coal, wind]
+#    These represent how many MWh we generate from each source.
 
-# 2. Define decision variables
-coal = pulp.LpVariable('Coal', lowBound=0)  # electricity from coal plant
-wind = pulp.LpVariable('Wind', lowBound=0)  # electricity from wind plant
-# ^ These represent how many MWh we generate from each source.
-
-# 3. Objective function
-model += 50 * coal + 20 * wind
+# 2. Objective function
+c = [50, 20]
 # ^ Cost per MWh: Coal = $50, Wind = $20
-# ^ First 'model +=' defines the *objective* we want to minimize.
 
-# 4. Constraints
-model += coal + wind >= 100   # meet demand of 100 MWh
-model += coal <= 80           # coal plant capacity = 80 MWh
-model += wind <= 50           # wind plant capacity = 50 MWh
-# ^ Each 'model +=' after the objective adds a constraint.
+# 3. Constraints (written as A_ub @ x <= b_ub)
+A_ub = [
+    [-1, -1],  # coal + wind >= 100  ->  -coal - wind <= -100 (meet demand of 100 MWh)
+    [1, 0],    # coal <= 80 (coal plant capacity = 80 MWh)
+    [0, 1],    # wind <= 50 (wind plant capacity = 50 MWh)
+]
+b_ub = [-100, 80, 50]
+# ^ linprog's default bounds already keep both variables >= 0.
 
-# 5. Solve the problem
-model.solve()
+# 4. Solve the problem in-process with HiGHS
+res = linprog(c=c, A_ub=A_ub, b_ub=b_ub, method="highs")
 
-# 6. Print results
-print("Status:", pulp.LpStatus[model.status])        # shows if solution is Optimal
-print("Coal MWh:", coal.varValue)                    # optimal coal generation
-print("Wind MWh:", wind.varValue)                    # optimal wind generation
-print("Total Cost:", pulp.value(model.objective))    # minimum total cost
+# 5. Print results
+coal, wind = res.x
+print("Status:", res.message)       # shows if solution is optimal
+print("Coal MWh:", coal)            # optimal coal generation
+print("Wind MWh:", wind)            # optimal wind generation
+print("Total Cost:", res.fun)       # minimum total cost
@@ -1,9 +1,16 @@
 # src/pyomo_stage3_battery.py
+import os
+import shutil
+
 from pyomo.environ import (
-    ConcreteModel, Set, Param, Var, NonNegativeReals,
+    AbstractModel, Set, Param, Var, NonNegativeReals,
     Objective, Constraint, SolverFactory, value
 )
-import matplotlib.pyplot as plt
+from pyomo.core.expr.numeric_expr import LinearExpression
+from pyomo.opt import TerminationCondition
+import numpy as np
+
+from dispatch_util import postprocess
 
 # --------------------------
 # 0. Problem data (toy example; same numbers as before)
@@ -28,18 +35,19 @@ initial_energy = 0.0
 # --------------------------
 # 1. Build Pyomo model
 # --------------------------
-m = ConcreteModel()
+# AbstractModel: the symbolic model is declared once and instantiated from a
+# data dict with create_instance(); scenario sweeps then only update mutable params.
+m = AbstractModel()
 
-# index set
-m.H = Set(initialize=hours)
+# index set (ordered, so rules can use H.first()/H.last()/H.prev())
+m.H = Set(ordered=True)
 
-# parameters
-m.demand = Param(m.H, initialize=demand)
-m.coal_cost = Param(m.H, initialize=coal_cost)
-m.wind_cost = Param(initialize=wind_cost)  # scalar param
-# capacity params (we'll use python dict lookup inside rules for simplicity)
-m.coal_max = Param(m.H, initialize=coal_max)
-m.wind_max = Param(m.H, initialize=wind_max)
+# parameters (demand and costs are mutable so sweeps can change them in place)
+m.demand = Param(m.H, mutable=True)
+m.coal_cost = Param(m.H, mutable=True)
+m.wind_cost = Param(mutable=True)  # scalar param
+m.coal_max = Param(m.H)
+m.wind_max = Param(m.H)
 
 # --------------------------
 # 2. Variables
@@ -55,10 +63,17 @@ m.energy = Var(m.H, domain=NonNegativeReals, bounds=(0, battery_capacity))
 # 3. Objective: generation cost + degradation cost
 # --------------------------
 def objective_rule(model):
-    gen_cost = sum(model.coal_cost[h] * model.coal[h] + model.wind_cost * model.wind[h] for h in model.H)
-    # approximate throughput cost with average of charge & discharge (linear)
-    deg_cost = sum(degradation_cost_per_mwh * 0.5 * (model.charge[h] + model.discharge[h]) for h in model.H)
-    return gen_cost + deg_cost
+    # generation cost + throughput cost approximated with average of charge & discharge (linear),
+    # built as a single LinearExpression instead of a summed expression tree
+    H = list(model.H)
+    n = len(H)
+    half_deg = 0.5 * degradation_cost_per_mwh
+    return LinearExpression(
+        constant=0,
+        linear_coefs=[model.coal_cost[h] for h in H] + [model.wind_cost] * n + [half_deg] * n + [half_deg] * n,
+        linear_vars=[model.coal[h] for h in H] + [model.wind[h] for h in H]
+                    + [model.charge[h] for h in H] + [model.discharge[h] for h in H],
+    )
 
 m.TotalCost = Objective(rule=objective_rule, sense=1)  # sense=1 is minimize
 
@@ -66,8 +81,13 @@ m.TotalCost = Objective(rule=objective_rule, sense=1)  # sense=1 is minimize
 # 4. Constraints
 # --------------------------
 def power_balance_rule(model, h):
-    # generation + discharge == demand + charge
-    return model.coal[h] + model.wind[h] + model.discharge[h] == model.demand[h] + model.charge[h]
+    # generation + discharge - charge == demand
+    lhs = LinearExpression(
+        constant=0,
+        linear_coefs=[1.0, 1.0, 1.0, -1.0],
+        linear_vars=[model.coal[h], model.wind[h], model.discharge[h], model.charge[h]],
+    )
+    return lhs == model.demand[h]
 m.PowerBalance = Constraint(m.H, rule=power_balance_rule)
 
 def coal_capacity_rule(model, h):
@@ -80,66 +100,115 @@ m.WindCap = Constraint(m.H, rule=wind_capacity_rule)
 
 # Energy (SOC) dynamics with efficiencies and optional standing loss
 def energy_balance_rule(model, h):
-    # find index of h to get previous hour
-    idx = hours.index(h)
+    # ordered-set first()/prev() are O(1) lookups (no O(T) list.index per rule call)
     loss = standing_loss_fraction
-    if idx == 0:
-        prev_energy = initial_energy
+    # energy[h] - charge_eff*charge[h] + discharge[h]/discharge_eff - (1-loss)*prev_energy == 0
+    coefs = [1.0, -charge_eff, 1.0 / discharge_eff]
+    variables = [model.energy[h], model.charge[h], model.discharge[h]]
+    if h == model.H.first():
+        rhs = (1 - loss) * initial_energy
     else:
-        prev = hours[idx - 1]
-        prev_energy = model.energy[prev]
-    # energy[h] == (1-loss)*prev_energy + charge_eff*charge[h] - discharge[h]/discharge_eff
-    return model.energy[h] == (1 - loss) * prev_energy + charge_eff * model.charge[h] - model.discharge[h] / discharge_eff
+        coefs.append(-(1 - loss))
+        variables.append(model.energy[model.H.prev(h)])
+        rhs = 0.0
+    return LinearExpression(constant=0, linear_coefs=coefs, linear_vars=variables) == rhs
 
 m.EnergyBalance = Constraint(m.H, rule=energy_balance_rule)
 
 # Optional: force end-of-horizon SOC to zero (avoid "value hiding" after horizon)
 def end_soc_rule(model):
-    last = hours[-1]
-    return model.energy[last] == 0.0
+    return model.energy[model.H.last()] == 0.0
 m.EndOfHorizonSOC = Constraint(rule=end_soc_rule)
 
 # --------------------------
-# 5. Solve
+# 5. Instantiate and solve
 # --------------------------
-# Choose solver: try GLPK first. If you prefer CBC, change 'glpk' -> 'cbc'
-solver_name = 'glpk'   # change to 'cbc' or 'gurobi' if you have it
-solver = SolverFactory(solver_name)
+data = {None: {
+    'H': {None: hours},
+    'demand': demand,
+    'coal_cost': coal_cost,
+    'wind_cost': {None: wind_cost},
+    'coal_max': coal_max,
+    'wind_max': wind_max,
+}}
+inst = m.create_instance(data)
+
+# Choose solver: CBC through the NL-file (AMPL/ASL) interface, which writes large
+# models much faster than the LP-file interface (Pyomo's CBC plugin itself drops back
+# to LP files, with a warning, if the cbc build lacks ASL). Use GLPK if cbc is not on PATH.
+solver_name = 'cbc'   # change to 'glpk' or 'gurobi' if you prefer
+if shutil.which(solver_name):
+    solver = SolverFactory(solver_name, solver_io='nl')
+else:
+    solver = SolverFactory('glpk')
 
 # solve with solver output printed (tee=True) so you see solver log in PyCharm console
-results = solver.solve(m, tee=True)
+results = solver.solve(inst, tee=True)
 
 # --------------------------
 # 6. Show results
 # --------------------------
 print("Solver status:", results.solver.status)
 print("Solver termination condition:", results.solver.termination_condition)
-print("Objective (total cost + degradation) = ", value(m.TotalCost))
+print("Objective (total cost + degradation) = ", value(inst.TotalCost))
 print()
 
-coal_out = [value(m.coal[h]) for h in hours]
-wind_out = [value(m.wind[h]) for h in hours]
-charge_out = [value(m.charge[h]) for h in hours]
-discharge_out = [value(m.discharge[h]) for h in hours]
-energy_out = [value(m.energy[h]) for h in hours]
+def _values(var):
+    return np.fromiter((value(var[h]) for h in hours), dtype=np.float64, count=len(hours))
+
+coal_out = _values(inst.coal)
+wind_out = _values(inst.wind)
+charge_out = _values(inst.charge)
+discharge_out = _values(inst.discharge)
+energy_out = _values(inst.energy)
+
+for h, c, w, ch, dis, e in zip(hours, coal_out, wind_out, charge_out, discharge_out, energy_out):
+    print(f"Hour {h}: Coal={c:.2f}, Wind={w:.2f}, "
+          f"Charge={ch:.2f}, Discharge={dis:.2f}, SOC={e:.2f}")
 
-for h in hours:
-    print(f"Hour {h}: Coal={coal_out[h-1]:.2f}, Wind={wind_out[h-1]:.2f}, "
-          f"Charge={charge_out[h-1]:.2f}, Discharge={discharge_out[h-1]:.2f}, SOC={energy_out[h-1]:.2f}")
+coal_cost_arr = np.array([coal_cost[h] for h in hours], dtype=np.float64)
+costs, throughput, soc_residual = postprocess(coal_out, wind_out, charge_out, discharge_out, energy_out,
+                                              coal_cost_arr, float(wind_cost), degradation_cost_per_mwh, initial_energy,
+                                              charge_eff, discharge_eff, standing_loss_fraction)
+print()
+print(f"Coal cost=${costs[:, 0].sum():.2f}, Wind cost=${costs[:, 1].sum():.2f}, "
+      f"Degradation cost=${costs[:, 2].sum():.2f}, Battery throughput={throughput[-1]:.2f} MWh")
+print(f"Max SOC balance residual = {np.abs(soc_residual).max():.2e} MWh")
+
+# Scenario sweep: peak-hour coal price (opt-in with RUN_SWEEP=1). The instance is reused;
+# only the mutable coal_cost params change, so nothing is rebuilt between solves.
+if __name__ == "__main__" and os.environ.get("RUN_SWEEP") == "1":
+    peak_hours = [4, 5]
+    for peak_price in [60, 100, 120]:
+        for h in peak_hours:
+            inst.coal_cost[h] = peak_price
+        sweep_results = solver.solve(inst)
+        if sweep_results.solver.termination_condition != TerminationCondition.optimal:
+            print(f"Peak coal price ${peak_price}/MWh -> {sweep_results.solver.termination_condition}")
+            continue
+        print(f"Peak coal price ${peak_price}/MWh -> objective = {value(inst.TotalCost):.2f}")
 
 # --------------------------
 # 7. Plot (optional)
 # --------------------------
-plt.figure(figsize=(9,5))
-plt.bar(hours, wind_out, label="Wind", color="skyblue", edgecolor='k')
-plt.bar(hours, coal_out, bottom=wind_out, label="Coal", color="lightcoral", edgecolor='k')
-plt.bar(hours, charge_out, label="Charge", color="green", alpha=0.6)
-plt.bar(hours, [-d for d in discharge_out], label="Discharge", color="orange", alpha=0.6)
-ax2 = plt.twinx()
-ax2.plot(hours, energy_out, '-o', color='black', label='SOC')
-plt.xlabel("Hour")
-plt.ylabel("MWh")
-plt.title("Pyomo: Dispatch with realistic battery costs & efficiencies")
-plt.legend(loc='upper left')
-plt.grid(True, linestyle='--', alpha=0.4)
-plt.show()
+def _plot(hours, coal_out, wind_out, charge_out, discharge_out, energy_out):
+    import matplotlib.pyplot as plt
+
+    fig, ax = plt.subplots(figsize=(9,5))
+    ax.stackplot(hours, np.vstack([wind_out, coal_out]), labels=["Wind", "Coal"],
+                 colors=["skyblue", "lightcoral"], edgecolor='k')
+    ax.bar(hours, charge_out, label="Charge", color="green", alpha=0.6)
+    ax.bar(hours, -discharge_out, label="Discharge", color="orange", alpha=0.6)
+    ax2 = ax.twinx()
+    ax2.plot(hours, energy_out, '-o', color='black', label='SOC')
+    ax.set_xlabel("Hour")
+    ax.set_ylabel("MWh")
+    ax.set_title("Pyomo: Dispatch with realistic battery costs & efficiencies")
+    ax.legend(loc='upper left')
+    ax.grid(True, linestyle='--', alpha=0.4)
+    plt.show()
+
+
+if __name__ == "__main__" and os.environ.get("NO_PLOT") != "1":
+    _plot(hours, coal_out, wind_out, charge_out, discharge_out, energy_out)
+